@@ -20,7 +20,8 @@ __doc__ = """
     The module provides:
 
         * Simplified handling of connections/cursor
-            * Connection pool (provided by psycopg2.pool)
+            * Connection pool (based on psycopg2.pool) with concurrent
+              warm-up and adaptive sizing
             * Cursor context handler 
         * Python API to wrap basic SQL functionality 
             * Simple select,update,delete,join methods extending the cursor 
@@ -28,6 +29,9 @@ __doc__ = """
               create an implicit cursor for simple queries)
         * Query results as dict (using psycopg2.extras.DictCursor)
         * Callable prepared statements
+        * Schema metadata cache
+        * Pluggable driver (psycopg2 or psycopg 3 with pipeline support)
+        * Per-call timeouts and deadlines with server-side cancellation
         * Logging support
         * Supports Python 2/3
 
@@ -57,6 +61,16 @@ __doc__ = """
     The intention is that a single instance of this class is created at
     application start up.
 
+    The pool (pgwrap.pool.AdaptivePool) opens the initial 'min' connections
+    concurrently - by default before the constructor returns, or in the
+    background if 'warmup' is set to 'background' (or lazily if False).
+    The number of idle connections retained grows towards 'max' when callers
+    have to wait for new connections and surplus connections idle for more
+    than 'idle_timeout' seconds are closed.
+
+    >>> db = pgwrap.connection(url='postgres://localhost',min=2,max=10,
+    ...                        warmup='background',idle_timeout=60)
+
     Cursor
     ------
 
@@ -69,7 +83,8 @@ __doc__ = """
 
     The cursor object uses the psycopg2 'DictCursor' by default (which
     returns rows as a pseudo python dictionary) however this can be overridden
-    by providing a 'cursor_factory' parameter to the constructor.
+    by providing a 'cursor_factory' parameter to the constructor (the
+    pgwrap.db.RecordCursor factory returns lightweight tuple-based records).
 
     >>> db = pgwrap.connection(url='postgres://localhost')
     >>> with db.cursor() as c:
@@ -82,10 +97,17 @@ __doc__ = """
         query           - execute SQL query and fetch results
         query_one       - execute SQL query and fetch first result
         query_dict      - execute SQL query and return results as dict
-                          keyed on specified key (which should be unique)
+                          keyed on specified key (which should be unique
+                          unless group=True). The key can be a column,
+                          tuple of columns or function and the value
+                          parameter selects the column(s) stored. The dict
+                          is built incrementally (stream=True uses a
+                          server-side cursor).
         commit          - Commit transaction (called implicitly on exiting
                           context handler)
         rollback        - Rollback transaction
+        pipeline        - Context handler which queues statements and sends
+                          them to the server together (psycopg driver)
 
     In addition the cursor can use the SQL API methods described below or
     access the underlying psycopg2 cursor (via the self.cursor attribute).
@@ -106,6 +128,9 @@ __doc__ = """
         insert          - SQL insert
         update          - SQL update
         delete          - SQL delete
+        insert_many     - batched multi-row insert
+        update_many     - batched update (matched on key columns)
+        copy            - bulk load using COPY FROM STDIN
 
     The methods can be parameterised to customise the associated query 
     (see db module for detail): 
@@ -137,6 +162,15 @@ __doc__ = """
 
         returning       - columns to return (string)
 
+        row_type        - row type returned by select/join (and the query
+                          methods) for this call - 'dict', 'record' (tuple
+                          with column name and attribute access - classes
+                          are cached per set of columns) or 'tuple'. The
+                          record/tuple types are faster to build and use
+                          less memory for large results.
+
+                          row_type = 'record'
+
     The methods are also available as standalone functions which create an 
     implicit cursor object.
 
@@ -170,6 +204,99 @@ __doc__ = """
         UPDATE t1 SET count = count + 1 WHERE count < 10 RETURNING id,count
         [[1, 1]]
 
+    Batch Operations
+    ----------------
+
+        The insert_many, update_many and copy methods load multiple rows
+        (dicts or sequences matching the 'columns' parameter) in batches.
+
+        By default a failing row aborts the batch (and transaction). If
+        on_error='isolate' is specified each batch is run under a SAVEPOINT
+        and on an integrity/data error the batch is rolled back to the
+        savepoint and bisected to find the failing rows. The remaining rows
+        are loaded and a BatchResult (rowcount,failures) is returned where
+        failures is a list of (row,error) tuples.
+
+        >>> r = db.insert_many('t1',[{'name':'a'},{'name':None}],on_error='isolate')
+        >>> r.rowcount
+        1
+        >>> r.failures
+        [({'name': None}, NotNullViolation(...))]
+
+    Timeouts
+    --------
+
+        The SQL methods accept a 'timeout' parameter (in seconds - defaults to
+        the 'timeout' connection parameter). The timeout is applied using
+        SET LOCAL statement_timeout (sent with the statement) and a
+        client-side watchdog cancels the query if the server has not
+        responded shortly after this. On timeout the transaction is rolled
+        back (leaving the connection in a clean state) and
+        pgwrap.db.QueryTimeout is raised. As earlier statements in the
+        transaction have been discarded, further statements (and commit) in
+        the same cursor raise QueryTimeout until rollback() is called.
+
+        The pgwrap.db.deadline context handler sets a time budget shared by
+        all SQL calls inside the context (in the current thread) - each call
+        is limited to the remaining time and nested deadlines can only
+        reduce this.
+
+        >>> db = pgwrap.connection(url='postgres://localhost',timeout=30)
+        >>> db.select('t1',timeout=5)
+        [[1, 'xyz', 1], [2, 'xyz', None]]
+        >>> with pgwrap.db.deadline(10):
+        ...     with db.cursor() as c:
+        ...         c.select('t1')
+        ...         c.join(('t1','t2'))
+
+    Drivers
+    -------
+
+        The database driver is selected using the 'driver' connection
+        parameter (or the PGWRAP_DRIVER environment variable) - this can be
+        either 'psycopg2' (the default) or 'psycopg' (psycopg 3). The API
+        is the same for both drivers - with the psycopg driver the pgwrap
+        cursor factories (and the psycopg2 DictCursor, RealDictCursor and
+        NamedTupleCursor factories) are mapped to the equivalent psycopg
+        row factory (other psycopg2 cursor classes raise ValueError).
+
+        With the psycopg driver statements executed inside the cursor
+        pipeline context are queued and sent to the server in a single
+        network flush (using psycopg pipeline mode). The results (rowcount
+        or rows) are available from the pipeline object on exit.
+
+        >>> db = pgwrap.connection(url='postgres://localhost',driver='psycopg')
+        >>> with db.cursor() as c:
+        ...     with c.pipeline() as p:
+        ...         c.insert('t1',{'name':'abc'})
+        ...         c.insert('t1',{'name':'def'})
+        ...         c.update('t1',{'count':0},where={'name':'abc'})
+        >>> p.results
+        [1, 1, 1]
+
+    Schema Cache
+    ------------
+
+        The connection.schema attribute caches table, column, type and primary
+        key metadata for the 'public' schema (loaded using a single catalog
+        query on first use). This is used by check_table, to provide the
+        default key for select_dict (the table primary key) and to resolve
+        'table.column' prepared statement parameter types.
+
+        The cache is only loaded from committed state (tables changed by
+        pgwrap DDL in the current transaction are read from the catalog
+        directly). It is reloaded when a committed create_table/drop_table
+        changes a cached table, when a table is not found in the cache, when
+        refresh_schema() is called, or when older than the 'schema_ttl'
+        connection parameter (in seconds - defaults to no expiry).
+
+        >>> db = pgwrap.connection(url='postgres://localhost',schema_ttl=300)
+        >>> db.get_schema().columns('t1')
+        OrderedDict([('id', 'integer'), ('name', 'text'), ('count', 'integer')])
+        >>> db.select_dict('t1')
+        {1: [1, 'xyz', 1], 2: [2, 'xyz', None]}
+        >>> db.refresh_schema()
+
     Prepared Statements
     -------------------
 
@@ -180,7 +307,8 @@ __doc__ = """
             stmt      : prepared statement (with parameters identified 
                         in the statement using the psql $1,$2... notation)
             params    : list of optional parameter types (usually not 
-                        needed - infered by psql)
+                        needed - infered by psql). Types can be specified
+                        as 'table.column' to use the column type
             name      : name for the prepared statement (usually
                         autogenerated)
             call_type : method used when instance called as method
@@ -224,6 +352,18 @@ __doc__ = """
         >>> db.query('SELECT * FROM t1')
         [0.000536] SELECT * FROM t1
 
+    Benchmarks
+    ----------
+
+        The pgwrap.bench package measures pgwrap overhead against raw psycopg2
+        (select_one latency, insert/batch/COPY throughput, query memory use,
+        pool contention and SQL builder cost) and writes the results as JSON.
+        Query memory is reported as peak Python heap ('peak_bytes') and peak
+        RSS increase ('peak_rss_bytes' - Linux only) which also includes the
+        libpq result buffer for full (non-streaming) fetches.
+
+        $ python -m pgwrap.cli bench --rows 10000 --threads 8 --output run.json
+
     Changelog
     ---------
 
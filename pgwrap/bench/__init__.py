@@ -0,0 +1,80 @@
+"""
+    pgwrap benchmarks
+
+    Measures pgwrap overhead against raw psycopg2 for common operations
+    (run against a local database - tables named 'pgwrap_bench*' are
+    created and dropped):
+
+        python -m pgwrap.cli bench [--url URL] [--rows N] [--repeat N]
+                                   [--threads N] [--output FILE] [name...]
+
+    Results are written as JSON so that runs can be diffed. The query_memory
+    benchmark reports peak Python heap ('peak_bytes' - tracemalloc) and peak
+    RSS increase ('peak_rss_bytes' - Linux only, includes libpq buffers).
+"""
+
+import json,platform,sys,time
+
+timer = getattr(time,'perf_counter',time.time)
+
+def stats(times):
+    """
+        Summarise list of timings (secs)
+
+        >>> stats([3.0,1.0,2.0])
+        {'n': 3, 'min': 1.0, 'median': 2.0, 'mean': 2.0, 'max': 3.0}
+    """
+    times = sorted(times)
+    return { 'n'      : len(times),
+             'min'    : times[0],
+             'median' : times[len(times) // 2],
+             'mean'   : sum(times) / len(times),
+             'max'    : times[-1] }
+
+def measure(f,repeat,setup=None):
+    # Time f over repeat runs (setup is called untimed before each run)
+    times = []
+    for i in range(repeat):
+        if setup:
+            setup()
+        start = timer()
+        f()
+        times.append(timer() - start)
+    return stats(times)
+
+def run(url=None,rows=10000,repeat=5,threads=8,names=None,output=None):
+    import psycopg2
+    import pgwrap
+    from pgwrap.bench.cases import benchmarks
+    results = {}
+    for (name,f) in benchmarks:
+        if names and name not in names:
+            continue
+        results[name] = f(url=url,rows=rows,repeat=repeat,threads=threads)
+    report = { 'meta' : { 'timestamp'  : time.strftime('%Y-%m-%dT%H:%M:%S'),
+                          'python'     : platform.python_version(),
+                          'pgwrap'     : pgwrap.version,
+                          'psycopg2'   : psycopg2.__version__,
+                          'rows'       : rows,
+                          'repeat'     : repeat,
+                          'threads'    : threads },
+               'results' : results }
+    json.dump(report,output or sys.stdout,indent=2,sort_keys=True)
+    (output or sys.stdout).write('\n')
+    return report
+
+def main(argv=None):
+    import argparse
+    from pgwrap.bench.cases import benchmarks
+    parser = argparse.ArgumentParser(prog='pgwrap bench',
+                                     description='Benchmark pgwrap against raw psycopg2')
+    parser.add_argument('--url',help='database URL (default DATABASE_URL or postgres://localhost/)')
+    parser.add_argument('--rows',type=int,default=10000,help='rows for throughput tests')
+    parser.add_argument('--repeat',type=int,default=5,help='repetitions per test')
+    parser.add_argument('--threads',type=int,default=8,help='threads for pool contention test')
+    parser.add_argument('--output',type=argparse.FileType('w'),help='write JSON results to file')
+    parser.add_argument('names',nargs='*',metavar='name',
+                        help='benchmarks to run (%s)' % ', '.join(n for (n,_) in benchmarks))
+    args = parser.parse_args(argv)
+    run(url=args.url,rows=args.rows,repeat=args.repeat,threads=args.threads,
+        names=args.names,output=args.output)
@@ -0,0 +1,4 @@
+
+import pgwrap.bench
+
+pgwrap.bench.main()
@@ -0,0 +1,248 @@
+"""
+    Benchmark cases - each compares pgwrap with the equivalent raw psycopg2
+    code and returns a dict of results keyed on variant
+"""
+
+import ctypes,io,os,threading
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extras
+import psycopg2.pool
+from psycopg2 import sql
+
+from pgwrap import sqlop
+from pgwrap.db import connection,connect_params,cursor
+from pgwrap.bench import measure
+
+_table = 'pgwrap_bench'
+_schema = 'id SERIAL PRIMARY KEY, name TEXT NOT NULL, value INTEGER NOT NULL'
+
+def _rate(s,n):
+    # Convert timing stats for 'n' operations into latency/throughput
+    return { 'ops'            : n,
+             'latency_us'     : s['median'] / n * 1e6,
+             'ops_per_sec'    : n / s['median'],
+             'seconds'        : s }
+
+@contextmanager
+def _setup(url,rows):
+    db = connection(url)
+    db.drop_table(_table)
+    db.create_table(_table,_schema)
+    db.execute('INSERT INTO %s (name,value) SELECT md5(i::text), i FROM generate_series(1,%%s) i' % _table,
+               (rows,))
+    raw = psycopg2.connect(**connect_params(url))
+    try:
+        yield db,raw
+    finally:
+        raw.close()
+        db.drop_table(_table)
+        db.shutdown()
+
+def _truncate(db):
+    db.execute('TRUNCATE %s' % _table)
+
+def select_one(url,rows,repeat,threads):
+    n = min(rows,1000)
+    with _setup(url,rows) as (db,raw):
+        def _pgwrap():
+            with db.cursor() as c:
+                for i in range(1,n+1):
+                    c.select_one(_table,where={'id':i})
+        def _pgwrap_implicit():
+            for i in range(1,n+1):
+                db.select_one(_table,where={'id':i})
+        def _psycopg2():
+            with raw.cursor(cursor_factory=psycopg2.extras.DictCursor) as c:
+                for i in range(1,n+1):
+                    c.execute('SELECT * FROM pgwrap_bench WHERE id = %(id)s',{'id':i})
+                    c.fetchone()
+            raw.commit()
+        return { 'pgwrap'           : _rate(measure(_pgwrap,repeat),n),
+                 'pgwrap_implicit'  : _rate(measure(_pgwrap_implicit,repeat),n),
+                 'psycopg2'         : _rate(measure(_psycopg2,repeat),n) }
+
+def insert(url,rows,repeat,threads):
+    data = [ {'name':'row%d' % i,'value':i} for i in range(rows) ]
+    with _setup(url,0) as (db,raw):
+        def _pgwrap():
+            with db.cursor() as c:
+                for v in data:
+                    c.insert(_table,v)
+        def _pgwrap_pipeline():
+            with db.cursor() as c:
+                with c.pipeline():
+                    for v in data:
+                        c.insert(_table,v)
+        def _pgwrap_batch():
+            db.insert_many(_table,data)
+        def _pgwrap_batch_isolate():
+            db.insert_many(_table,data,on_error='isolate')
+        def _pgwrap_copy():
+            db.copy(_table,data)
+        def _psycopg2():
+            with raw.cursor() as c:
+                for v in data:
+                    c.execute('INSERT INTO pgwrap_bench (name,value) VALUES (%(name)s,%(value)s)',v)
+            raw.commit()
+        def _psycopg2_batch():
+            with raw.cursor() as c:
+                psycopg2.extras.execute_values(c,'INSERT INTO pgwrap_bench (name,value) VALUES %s',
+                                               [ (v['name'],v['value']) for v in data ])
+            raw.commit()
+        def _psycopg2_copy():
+            f = io.StringIO(u''.join(u'%s\t%d\n' % (v['name'],v['value']) for v in data))
+            with raw.cursor() as c:
+                c.copy_expert('COPY pgwrap_bench (name,value) FROM STDIN',f)
+            raw.commit()
+        results = {}
+        for (name,f) in (('pgwrap',_pgwrap),
+                         ('pgwrap_pipeline',_pgwrap_pipeline),
+                         ('pgwrap_batch',_pgwrap_batch),
+                         ('pgwrap_batch_isolate',_pgwrap_batch_isolate),
+                         ('pgwrap_copy',_pgwrap_copy),
+                         ('psycopg2',_psycopg2),
+                         ('psycopg2_batch',_psycopg2_batch),
+                         ('psycopg2_copy',_psycopg2_copy)):
+            results[name] = _rate(measure(f,repeat,setup=lambda: _truncate(db)),rows)
+        return results
+
+def _peak_memory(f):
+    # Peak Python heap allocation (does not include libpq result buffers)
+    try:
+        import tracemalloc
+    except ImportError:
+        return None
+    tracemalloc.start()
+    try:
+        f()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def _peak_rss(f,interval=0.001):
+    # Peak increase in process RSS (includes libpq result buffers) sampled
+    # while f runs - only available on Linux. Freed heap memory is returned
+    # to the OS first (glibc) so earlier runs don't hide the allocation.
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+        start = _rss()
+    except (OSError,AttributeError):
+        return None
+    samples = [start]
+    done = threading.Event()
+    def _sample():
+        while not done.wait(interval):
+            samples.append(_rss())
+    t = threading.Thread(target=_sample)
+    t.start()
+    try:
+        f()
+        samples.append(_rss())
+    finally:
+        done.set()
+        t.join()
+    return max(samples) - start
+
+def query_memory(url,rows,repeat,threads):
+    with _setup(url,rows) as (db,raw):
+        def _pgwrap():
+            len(db.query('SELECT * FROM pgwrap_bench'))
+        def _pgwrap_dict():
+            len(db.query_dict('SELECT * FROM pgwrap_bench','id',value='value'))
+        def _pgwrap_dict_stream():
+            len(db.query_dict('SELECT * FROM pgwrap_bench','id',value='value',stream=True))
+        def _psycopg2():
+            with raw.cursor(cursor_factory=psycopg2.extras.DictCursor) as c:
+                c.execute('SELECT * FROM pgwrap_bench')
+                len(c.fetchall())
+            raw.commit()
+        def _psycopg2_stream():
+            with raw.cursor('pgwrap_bench_stream',cursor_factory=psycopg2.extras.DictCursor) as c:
+                c.itersize = 1000
+                c.execute('SELECT * FROM pgwrap_bench')
+                for row in c:
+                    pass
+            raw.commit()
+        results = {}
+        for (name,f) in (('pgwrap',_pgwrap),
+                         ('pgwrap_dict',_pgwrap_dict),
+                         ('pgwrap_dict_stream',_pgwrap_dict_stream),
+                         ('psycopg2',_psycopg2),
+                         ('psycopg2_stream',_psycopg2_stream)):
+            results[name] = _rate(measure(f,repeat),rows)
+            results[name]['peak_bytes'] = _peak_memory(f)
+            results[name]['peak_rss_bytes'] = _peak_rss(f)
+        return results
+
+def pool_contention(url,rows,repeat,threads):
+    n = min(rows,1000)
+    def _threaded(f):
+        def _run():
+            t = [ threading.Thread(target=f) for i in range(threads) ]
+            for x in t:
+                x.start()
+            for x in t:
+                x.join()
+        return _run
+    with _setup(url,rows) as (db,raw):
+        pdb = connection(url,min=threads,max=threads)
+        ppool = psycopg2.pool.ThreadedConnectionPool(threads,threads,**connect_params(url))
+        def _pgwrap():
+            for i in range(1,n+1):
+                with pdb.cursor() as c:
+                    c.select_one(_table,where={'id':i})
+        def _psycopg2():
+            for i in range(1,n+1):
+                conn = ppool.getconn()
+                with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as c:
+                    c.execute('SELECT * FROM pgwrap_bench WHERE id = %(id)s',{'id':i})
+                    c.fetchone()
+                conn.commit()
+                ppool.putconn(conn)
+        try:
+            return { 'pgwrap'   : _rate(measure(_threaded(_pgwrap),repeat),n * threads),
+                     'psycopg2' : _rate(measure(_threaded(_psycopg2),repeat),n * threads) }
+        finally:
+            pdb.shutdown()
+            ppool.closeall()
+
+def sql_builder(url,rows,repeat,threads):
+    n = max(rows,1000)
+    where = {'name':'abc','value__gt':10,'id__in':(1,2,3)}
+    c = cursor(None,None,False,None,None)
+    raw = psycopg2.connect(**connect_params(url))
+    try:
+        def _pgwrap():
+            for i in range(n):
+                c._build_select(_table,where,('name__desc',),('id','name'),10,None,False)
+        def _pgwrap_join():
+            for i in range(n):
+                c._build_join(('t1','t2'),where,None,('name',),None,None,None)
+        def _pgwrap_update():
+            for i in range(n):
+                sqlop.update({'name':'x','value__add':1}) + sqlop.where(where)
+        def _psycopg2():
+            for i in range(n):
+                sql.SQL('SELECT {} FROM {} WHERE {} = %(name)s AND {} > %(value__gt)s '
+                        'AND {} IN %(id__in)s ORDER BY {} DESC LIMIT 10').format(
+                            sql.SQL(', ').join([sql.Identifier('id'),sql.Identifier('name')]),
+                            sql.Identifier(_table),sql.Identifier('name'),sql.Identifier('value'),
+                            sql.Identifier('id'),sql.Identifier('name')).as_string(raw)
+        return { 'pgwrap_select'    : _rate(measure(_pgwrap,repeat),n),
+                 'pgwrap_join'      : _rate(measure(_pgwrap_join,repeat),n),
+                 'pgwrap_update'    : _rate(measure(_pgwrap_update,repeat),n),
+                 'psycopg2_sql'     : _rate(measure(_psycopg2,repeat),n) }
+    finally:
+        raw.close()
+
+benchmarks = [ ('select_one',select_one),
+               ('insert',insert),
+               ('query_memory',query_memory),
+               ('pool_contention',pool_contention),
+               ('sql_builder',sql_builder) ]
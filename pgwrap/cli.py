@@ -1,7 +1,11 @@
 
 import code,sys
-import pgwrap
-        
+import pgwrap.db
+
 if __name__ == '__main__':
-    db = pgwrap.db.connection()
-    code.interact(local=locals())
+    if sys.argv[1:2] == ['bench']:
+        import pgwrap.bench
+        pgwrap.bench.main(sys.argv[2:])
+    else:
+        db = pgwrap.db.connection()
+        code.interact(local=locals())
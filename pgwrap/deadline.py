@@ -0,0 +1,140 @@
+
+import heapq,itertools,threading,time
+from contextlib import contextmanager
+
+clock = getattr(time,'monotonic',time.time)
+
+_local = threading.local()
+
+class QueryTimeout(Exception):
+    """
+        Raised when a statement exceeds its timeout (or the enclosing deadline
+        has expired) - the original driver error (if any) is available as
+        the 'error' attribute
+    """
+    def __init__(self,msg,error=None):
+        super(QueryTimeout,self).__init__(msg)
+        self.error = error
+
+@contextmanager
+def deadline(seconds):
+    """
+        Limit the total time available to SQL calls inside the context (in
+        the current thread). Nested deadlines can only reduce the time
+        available.
+
+        >>> remaining() is None
+        True
+        >>> with deadline(10):
+        ...     with deadline(60):
+        ...         0 < remaining() <= 10
+        True
+        >>> with deadline(10):
+        ...     remaining(5) <= 5
+        True
+    """
+    _prev = getattr(_local,'deadline',None)
+    d = clock() + seconds
+    _local.deadline = d if _prev is None else min(_prev,d)
+    try:
+        yield
+    finally:
+        _local.deadline = _prev
+
+def remaining(timeout=None):
+    """
+        Return the smaller of 'timeout' and the time remaining before the
+        current deadline (None if neither is set)
+    """
+    d = getattr(_local,'deadline',None)
+    if d is None:
+        return timeout
+    r = d - clock()
+    return r if timeout is None else min(timeout,r)
+
+class Watchdog(object):
+    """
+        Single background thread which calls 'callback' if a watch is not
+        cancelled before it expires (used to cancel queries client-side)
+
+        >>> w = Watchdog()
+        >>> fired = []
+        >>> _ = w.watch(0.01,lambda: fired.append(1))
+        >>> t = w.watch(0.01,lambda: fired.append(2))
+        >>> w.cancel(t)
+        >>> time.sleep(0.1)
+        >>> fired
+        [1]
+        >>> for i in range(100):
+        ...     w.cancel(w.watch(30,lambda: None))
+        >>> len(w._heap) < 10
+        True
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._dead = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def watch(self,timeout,callback):
+        entry = [clock() + timeout,next(self._seq),callback,threading.Lock()]
+        with self._cond:
+            heapq.heappush(self._heap,entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify()
+        return entry
+
+    def cancel(self,entry):
+        # The callback is called holding the entry lock so once this returns
+        # it is not running and will not be called
+        with entry[3]:
+            if entry[2] is None:
+                return
+            entry[2] = None
+        # Cancelled entries are normally dropped when they reach the top of
+        # the heap - rebuild it if these are more than half the entries
+        with self._cond:
+            self._dead += 1
+            if self._dead > len(self._heap) // 2:
+                self._heap = [ e for e in self._heap if e[2] is not None ]
+                heapq.heapify(self._heap)
+                self._dead = 0
+
+    def _next(self):
+        # Wait for and remove the next expired entry
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0][2] is None:
+                    heapq.heappop(self._heap)
+                    self._dead = max(0,self._dead - 1)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                wait = self._heap[0][0] - clock()
+                if wait <= 0:
+                    return heapq.heappop(self._heap)
+                self._cond.wait(wait)
+
+    def _run(self):
+        while True:
+            entry = self._next()
+            # The callback (which may be slow) is called without holding the
+            # watchdog lock so other threads can watch/cancel meanwhile
+            with entry[3]:
+                callback,entry[2] = entry[2],None
+                if callback is not None:
+                    try:
+                        callback()
+                    except Exception:
+                        pass
+
+watchdog = Watchdog()
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,298 @@
+
+import binascii,io,json,os
+from collections import OrderedDict
+import psycopg2
+import psycopg2.extras
+from psycopg2.extras import DictCursor
+
+from pgwrap.record import AttrDictCursor,RecordCursor,SafeNamedTupleCursor,\
+                          namedtuple_class,record_class
+
+try:
+    import psycopg
+    from psycopg import sql
+    from psycopg.adapt import Dumper
+except ImportError:
+    psycopg = None
+
+class _nullcontext(object):
+    def __enter__(self):
+        return self
+    def __exit__(self,*args):
+        return False
+
+def _copy_array(v):
+    return '{' + ','.join('NULL' if x is None else
+                          _copy_array(x) if isinstance(x,(list,tuple)) else
+                          ('t' if x else 'f') if isinstance(x,bool) else
+                          '"%s"' % str(x).replace('\\','\\\\').replace('"','\\"')
+                                for x in v) + '}'
+
+def copy_text(v,type=None):
+    r"""
+        Format value for COPY text format (using column type if known)
+
+        >>> copy_text(None), copy_text(True), copy_text('a\tb\\c')
+        ('\\N', 't', 'a\\tb\\\\c')
+        >>> copy_text({'a':1},'jsonb'), copy_text([1,None],'integer[]')
+        ('{"a": 1}', '{"1",NULL}')
+        >>> copy_text(b'\x01\xff')
+        '\\\\x01ff'
+    """
+    if v is None:
+        return '\\N'
+    if isinstance(v,bool):
+        return 't' if v else 'f'
+    if isinstance(v,(list,tuple)) and not (type or '').startswith('json'):
+        v = _copy_array(v)
+    elif isinstance(v,(dict,list,tuple)):
+        v = json.dumps(v)
+    elif isinstance(v,(bytes,bytearray,memoryview)):
+        v = '\\x' + binascii.hexlify(bytes(v)).decode()
+    else:
+        v = str(v)
+    return v.replace('\\','\\\\').replace('\t','\\t').replace('\n','\\n').replace('\r','\\r')
+
+class TupleCursor(psycopg2.extensions.cursor):
+    """
+        psycopg2 cursor returning tuples (a Python subclass so that it
+        accepts attributes - eg. the log timestamp)
+    """
+
+class Psycopg2Driver(object):
+    """
+        Default driver (psycopg2)
+
+        Pipelines are emulated - statements are sent immediately and the
+        results collected on exit from the pipeline context.
+    """
+
+    name = 'psycopg2'
+    default_cursor = DictCursor
+    row_types = { 'tuple'  : TupleCursor,
+                  'record' : RecordCursor,
+                  'dict'   : DictCursor }
+    QueryCanceled = psycopg2.extensions.QueryCanceledError
+    # Errors caused by the row data (isolated by batch operations)
+    RowError = (psycopg2.IntegrityError,psycopg2.DataError)
+
+    def connect(self,**kwargs):
+        return psycopg2.connect(**kwargs)
+
+    def cursor(self,connection,name=None,cursor_factory=None):
+        return connection.cursor(name=name,
+                                 cursor_factory=cursor_factory or psycopg2.extensions.cursor)
+
+    def register_hstore(self,connection):
+        psycopg2.extras.register_hstore(connection)
+
+    def row_factory(self,cursor_factory):
+        return cursor_factory
+
+    def mogrify(self,cursor,sql,params):
+        return cursor.mogrify(sql,params).decode()
+
+    def in_transaction(self,connection):
+        return connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def execute_prefixed(self,cursor,prefix,sql,params):
+        # Multiple statements return the result of the last
+        cursor.execute(prefix + '; ' + sql,params)
+
+    def cancel(self,connection):
+        connection.cancel()
+
+    def copy(self,cursor,sql,rows,types):
+        f = io.StringIO(u''.join(u'\t'.join(copy_text(v,t) for (v,t) in zip(row,types)) + u'\n'
+                                        for row in rows))
+        cursor.copy_expert(sql,f)
+        return cursor.rowcount
+
+    def pipeline(self,connection):
+        return _nullcontext()
+
+if psycopg:
+
+    class Psycopg3DictRow(list):
+        """
+            Row supporting index and key access (equivalent to
+            psycopg2.extras.DictRow)
+        """
+        __slots__ = ('_index',)
+
+        def __init__(self,values,index):
+            super(Psycopg3DictRow,self).__init__(values)
+            self._index = index
+
+        def __getitem__(self,x):
+            if not isinstance(x,(int,slice)):
+                x = self._index[x]
+            return super(Psycopg3DictRow,self).__getitem__(x)
+
+        def get(self,x,default=None):
+            try:
+                return self[x]
+            except (KeyError,IndexError):
+                return default
+
+        def keys(self):
+            return list(self._index)
+
+        def values(self):
+            return list(self)
+
+        def items(self):
+            return list(zip(self._index,self))
+
+        def __contains__(self,x):
+            return x in self._index
+
+    def psycopg3_dict_row(cursor):
+        index = OrderedDict((d.name,i) for (i,d) in enumerate(cursor.description or ()))
+        return lambda values: Psycopg3DictRow(values,index)
+
+    class Psycopg3AttrDictRow(Psycopg3DictRow):
+        """
+            Psycopg3DictRow also supporting attribute access (equivalent to
+            pgwrap.db.AttrDictRow)
+        """
+        __slots__ = ()
+
+        def __getattr__(self,attr):
+            try:
+                return list.__getitem__(self,self._index[attr])
+            except KeyError:
+                raise AttributeError(attr)
+
+    def psycopg3_attr_dict_row(cursor):
+        index = OrderedDict((d.name,i) for (i,d) in enumerate(cursor.description or ()))
+        return lambda values: Psycopg3AttrDictRow(values,index)
+
+    def psycopg3_record_row(cursor):
+        return record_class(d.name for d in cursor.description or ())._make
+
+    def psycopg3_namedtuple_row(cursor):
+        return namedtuple_class(d.name for d in cursor.description or ())._make
+
+    class Psycopg3Cursor(psycopg.ClientCursor):
+        """
+            Client-side binding cursor (matches psycopg2 parameter handling
+            and supports mogrify) exposing the last query as 'cursor.query'
+        """
+        @property
+        def query(self):
+            return self._query.query if self._query else None
+
+    class _TupleDumper(Dumper):
+        # Adapt tuples as SQL lists (for IN operator) as psycopg2 does
+        def dump(self,obj):
+            return self.quote(obj)
+        def quote(self,obj):
+            return b'(' + b','.join(sql.Literal(v).as_bytes(self.connection) for v in obj) + b')'
+
+    class Psycopg3Driver(object):
+        """
+            psycopg 3 driver
+
+            Statements executed inside a pipeline context are queued and
+            sent to the server in a single network flush (using psycopg
+            pipeline mode).
+        """
+
+        name = 'psycopg'
+        default_cursor = staticmethod(psycopg3_dict_row)
+        row_types = { 'tuple'  : psycopg.rows.tuple_row,
+                      'record' : psycopg3_record_row,
+                      'dict'   : psycopg3_dict_row }
+        cursor_factories = { psycopg2.extensions.cursor         : psycopg.rows.tuple_row,
+                             TupleCursor                        : psycopg.rows.tuple_row,
+                             psycopg2.extras.DictCursor         : psycopg3_dict_row,
+                             psycopg2.extras.RealDictCursor     : psycopg.rows.dict_row,
+                             psycopg2.extras.NamedTupleCursor   : psycopg3_namedtuple_row,
+                             SafeNamedTupleCursor               : psycopg3_namedtuple_row,
+                             AttrDictCursor                     : psycopg3_attr_dict_row,
+                             RecordCursor                       : psycopg3_record_row }
+        QueryCanceled = psycopg.errors.QueryCanceled
+        RowError = (psycopg.IntegrityError,psycopg.DataError)
+
+        def connect(self,**kwargs):
+            if 'database' in kwargs:
+                kwargs['dbname'] = kwargs.pop('database')
+            connection = psycopg.connect(**kwargs)
+            connection.cursor_factory = Psycopg3Cursor
+            connection.adapters.register_dumper(tuple,_TupleDumper)
+            return connection
+
+        def cursor(self,connection,name=None,cursor_factory=None):
+            row_factory = self.row_factory(cursor_factory) or psycopg.rows.tuple_row
+            if name:
+                return connection.cursor(name,row_factory=row_factory)
+            return connection.cursor(row_factory=row_factory)
+
+        def register_hstore(self,connection):
+            from psycopg.types import TypeInfo
+            from psycopg.types.hstore import register_hstore
+            register_hstore(TypeInfo.fetch(connection,'hstore'),connection)
+
+        def row_factory(self,cursor_factory):
+            """
+                Return the psycopg row factory for cursor_factory - psycopg2
+                cursor classes (including the pgwrap cursor factories) are
+                mapped to the equivalent row factory, other values are
+                assumed to be row factories
+            """
+            if not (isinstance(cursor_factory,type) and
+                        issubclass(cursor_factory,psycopg2.extensions.cursor)):
+                return cursor_factory
+            try:
+                return self.cursor_factories[cursor_factory]
+            except KeyError:
+                raise ValueError("Cursor factory not supported by psycopg driver: %s" %
+                                        cursor_factory.__name__)
+
+        def mogrify(self,cursor,sql,params):
+            return cursor.mogrify(sql,params)
+
+        def in_transaction(self,connection):
+            return connection.info.transaction_status != psycopg.pq.TransactionStatus.IDLE
+
+        def execute_prefixed(self,cursor,prefix,sql,params):
+            # Multiple statements are positioned on the first result
+            cursor.execute(prefix + '; ' + sql,params)
+            cursor.nextset()
+
+        def cancel(self,connection):
+            getattr(connection,'cancel_safe',connection.cancel)()
+
+        def copy(self,cursor,sql,rows,types):
+            from psycopg.types.json import Json,Jsonb
+            wrap = [ Jsonb if t == 'jsonb' else Json if t == 'json' else None for t in types ]
+            with cursor.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row([ w(v) if w and v is not None else v for (v,w) in zip(row,wrap) ])
+            return cursor.rowcount
+
+        def pipeline(self,connection):
+            return connection.pipeline()
+
+_drivers = { 'psycopg2' : Psycopg2Driver }
+if psycopg:
+    _drivers['psycopg'] = Psycopg3Driver
+
+def get_driver(driver=None):
+    """
+        Return driver instance - 'driver' can be a driver name ('psycopg2' or
+        'psycopg'), a driver instance, or None (use PGWRAP_DRIVER environment
+        variable or psycopg2)
+    """
+    driver = driver or os.environ.get('PGWRAP_DRIVER') or 'psycopg2'
+    if not isinstance(driver,str):
+        return driver
+    try:
+        return _drivers[driver]()
+    except KeyError:
+        raise ValueError("Driver not available: %s" % driver)
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,166 @@
+
+import threading,time
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+class AdaptivePool(ThreadedConnectionPool):
+    """
+        Threaded connection pool which opens its initial connections
+        concurrently and resizes itself between 'minconn' and 'maxconn'
+
+        warmup        : True (default) opens the initial connections in
+                        parallel before returning, 'background' opens them
+                        in parallel without waiting, False opens them
+                        lazily on first use
+        wait_target   : average checkout time (secs) above which the
+                        number of idle connections retained is increased
+        idle_timeout  : time (secs) after which surplus idle connections
+                        are closed (the pool shrinks back towards min)
+        connect       : function used to open connections (defaults to
+                        psycopg2.connect)
+
+        The base class retains up to 'self.minconn' idle connections so
+        this is used as the current target size, with the configured
+        limits held in 'self.min'/'self.max'.
+
+        >>> p = AdaptivePool(2,4,host='localhost',wait_target=0,idle_timeout=0.5)
+        >>> len(p._pool)
+        2
+        >>> conns = [ p.getconn() for i in range(4) ]
+        >>> p.minconn
+        4
+        >>> for c in conns:
+        ...     p.putconn(c)
+        >>> len(p._pool)
+        4
+        >>> time.sleep(1.5)
+        >>> len(p._pool), p.minconn
+        (2, 2)
+        >>> p.closeall()
+
+        Errors opening connections in the background are raised by the
+        next getconn:
+
+        >>> p = AdaptivePool(1,2,host='/nonexistent',warmup='background')
+        >>> time.sleep(0.5)
+        >>> p.getconn()
+        Traceback (most recent call last):
+        ...
+        psycopg2.OperationalError: ...
+        >>> p.closeall()
+    """
+
+    def __init__(self,minconn,maxconn,*args,**kwargs):
+        warmup = kwargs.pop('warmup',True)
+        self.wait_target = kwargs.pop('wait_target',0.005)
+        self.idle_timeout = kwargs.pop('idle_timeout',300)
+        self.connect = kwargs.pop('connect',psycopg2.connect)
+        ThreadedConnectionPool.__init__(self,0,maxconn,*args,**kwargs)
+        self.min = self.minconn = int(minconn)
+        self.max = self.maxconn
+        self.wait = 0.0
+        self.warmup_error = None
+        self._idle = {}
+        self._stop = threading.Event()
+        if warmup:
+            self.warmup(wait=(warmup != 'background'))
+        if self.idle_timeout:
+            self._reaper = threading.Thread(target=self._reap)
+            self._reaper.daemon = True
+            self._reaper.start()
+
+    def warmup(self,n=None,wait=True):
+        """
+            Open 'n' (default minconn) connections concurrently. If wait is
+            True the first connection error (if any) is raised - otherwise
+            this is saved as 'warmup_error' and raised by the next getconn.
+        """
+        errors = []
+        def _open():
+            try:
+                conn = self.connect(*self._args,**self._kwargs)
+            except Exception as e:
+                with self._lock:
+                    errors.append(e)
+                    if not wait and self.warmup_error is None:
+                        self.warmup_error = e
+                return
+            with self._lock:
+                # getconn may have opened connections in the meantime
+                if self.closed or len(self._pool) >= self.maxconn - len(self._used):
+                    conn.close()
+                else:
+                    self._pool.append(conn)
+                    self._idle[id(conn)] = time.time()
+        n = self.minconn - len(self._pool) if n is None else n
+        threads = [ threading.Thread(target=_open) for i in range(n) ]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        if wait:
+            for t in threads:
+                t.join()
+            if errors:
+                raise errors[0]
+
+    def _connect(self,key=None):
+        conn = self.connect(*self._args,**self._kwargs)
+        if key is not None:
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+        else:
+            self._pool.append(conn)
+        return conn
+
+    def getconn(self,key=None):
+        start = time.time()
+        with self._lock:
+            if self.warmup_error is not None:
+                e,self.warmup_error = self.warmup_error,None
+                raise e
+            empty = not self._pool
+            conn = self._getconn(key)
+            self._idle.pop(id(conn),None)
+            # Exponentially weighted checkout time - grow the retained
+            # pool when callers are having to wait for new connections
+            self.wait = 0.8 * self.wait + 0.2 * (time.time() - start)
+            if empty and self.wait > self.wait_target:
+                self.minconn = min(self.max,self.minconn + 1)
+            return conn
+
+    def putconn(self,conn=None,key=None,close=False):
+        with self._lock:
+            self._putconn(conn,key,close)
+            if self._pool and self._pool[-1] is conn:
+                self._idle[id(conn)] = time.time()
+
+    def closeall(self):
+        self._stop.set()
+        ThreadedConnectionPool.closeall(self)
+
+    def shrink(self,now=None):
+        """
+            Close idle connections unused for more than idle_timeout
+            (retaining at least 'min') and reduce the target size to match
+        """
+        now = now or time.time()
+        with self._lock:
+            # Connections are checked out from the end of the list so the
+            # longest idle are at the front
+            while len(self._pool) > self.min and \
+                    now - self._idle.get(id(self._pool[0]),now) > self.idle_timeout:
+                conn = self._pool.pop(0)
+                self._idle.pop(id(conn),None)
+                conn.close()
+            self.minconn = max(self.min,min(self.minconn,
+                                            len(self._pool) + len(self._used)))
+
+    def _reap(self):
+        while not self._stop.wait(self.idle_timeout / 2.0):
+            if self.closed:
+                break
+            self.shrink()
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(optionflags=doctest.ELLIPSIS)
@@ -0,0 +1,119 @@
+
+from collections import OrderedDict,namedtuple
+from psycopg2.extras import DictCursor,DictRow,NamedTupleCursor
+
+_records = {}
+_namedtuples = {}
+MAX_CACHE = 1024
+
+def _cached(cache,fields,make):
+    try:
+        return cache[fields]
+    except KeyError:
+        if len(cache) >= MAX_CACHE:
+            cache.clear()
+        cls = cache[fields] = make(fields)
+        return cls
+
+# Record methods - columns with these names are renamed for attribute access
+_methods = ('get','keys','items')
+
+def _make_record(fields):
+    # Duplicate column names map to the last column (as DictRow)
+    index = OrderedDict((f,i) for (i,f) in enumerate(fields))
+    names = [ '_%d' % i if f in _methods else f for (i,f) in enumerate(fields) ]
+
+    class Record(namedtuple('Record',names,rename=True)):
+        __slots__ = ()
+        _index = index
+
+        def __getitem__(self,x,_getitem=tuple.__getitem__):
+            if not isinstance(x,(int,slice)):
+                x = self._index[x]
+            return _getitem(self,x)
+
+        def get(self,x,default=None):
+            try:
+                return self[x]
+            except (KeyError,IndexError):
+                return default
+
+        def keys(self):
+            return iter(self._index)
+
+        def items(self):
+            return ((f,tuple.__getitem__(self,i)) for (f,i) in self._index.items())
+
+        def __contains__(self,x):
+            return x in self._index
+
+    return Record
+
+def record_class(fields):
+    """
+        Return tuple-backed record class (with no per-instance dict) for the
+        column names 'fields'. Classes are cached and shared between queries
+        with the same column names.
+
+        Columns can be accessed by index, name or attribute (names which are
+        not valid identifiers or clash with the get/keys/items methods are
+        renamed to _<index> for attribute access)
+
+        >>> R = record_class(('id','name','count(*)'))
+        >>> R is record_class(('id','name','count(*)'))
+        True
+        >>> r = R(1,'abc',5)
+        >>> r
+        Record(id=1, name='abc', _2=5)
+        >>> r[1], r['name'], r.name, r['count(*)']
+        ('abc', 'abc', 'abc', 5)
+        >>> list(r.keys())
+        ['id', 'name', 'count(*)']
+        >>> r = record_class(('get','keys'))(1,2)
+        >>> r._0, r['get'], r.get('keys')
+        (1, 1, 2)
+    """
+    return _cached(_records,tuple(fields),_make_record)
+
+def namedtuple_class(fields):
+    return _cached(_namedtuples,tuple(fields),
+                   lambda fields: namedtuple('Record',fields,rename=True))
+
+class RecordCursor(NamedTupleCursor):
+    """
+        psycopg2 cursor returning rows as (cached) record_class instances
+    """
+    def _make_nt(self):
+        return record_class(d[0] for d in self.description or ())
+
+    def fetchall(self,chunk=1000):
+        # Convert in chunks to avoid holding the full list of tuples and
+        # records at the same time
+        rows = []
+        while True:
+            records = self.fetchmany(chunk)
+            if not records:
+                return rows
+            rows.extend(records)
+
+class SafeNamedTupleCursor(NamedTupleCursor):
+    def _make_nt(self):
+        return namedtuple_class(d[0] for d in self.description or ())
+
+class AttrDictRow(DictRow):
+    __slots__ = ()
+    def __getattr__(self,attr):
+        try:
+            return list.__getitem__(self,self._index[attr])
+        except KeyError:
+            raise AttributeError(attr)
+
+class AttrDictCursor(DictCursor):
+    def __init__(self, *args, **kwargs):
+        kwargs['row_factory'] = AttrDictRow
+        super(DictCursor, self).__init__(*args, **kwargs)
+        self._prefetch = 1
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,100 @@
+
+import threading,time
+from collections import OrderedDict,namedtuple
+
+Table = namedtuple('Table',('name','columns','primary_key'))
+
+_catalog_sql = """SELECT c.relname, a.attname, format_type(a.atttypid,a.atttypmod),
+                         array_position(i.indkey::int2[],a.attnum)
+                  FROM pg_class c
+                  JOIN pg_namespace n ON n.oid = c.relnamespace
+                  LEFT JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0
+                                              AND NOT a.attisdropped
+                  LEFT JOIN pg_index i ON i.indrelid = c.oid AND i.indisprimary
+                  WHERE n.nspname = %s AND c.relkind IN ('r','p')
+                  ORDER BY c.relname, a.attnum"""
+
+class Schema(object):
+    """
+        Cache of table/column/type/primary key metadata for a database
+        schema (loaded with a single catalog query)
+
+        The cache is loaded on first use and reloaded after invalidate()
+        is called (pgwrap DDL methods do this automatically) or when
+        older than 'ttl' seconds (if set). The cache does not hold a
+        connection - load() is passed the pgwrap cursor to use (this
+        should not have uncommitted DDL as the cache is shared).
+    """
+
+    def __init__(self,ttl=None,schemaname='public'):
+        self.ttl = ttl
+        self.schemaname = schemaname
+        self.tables = {}
+        self.loaded = None
+        self._lock = threading.Lock()
+
+    def expired(self):
+        return self.loaded is None or \
+                (self.ttl is not None and time.time() - self.loaded > self.ttl)
+
+    def invalidate(self):
+        self.loaded = None
+
+    def load(self,cursor):
+        tables = {}
+        for (table,column,type,pk) in cursor.query(_catalog_sql,(self.schemaname,),row_type='tuple'):
+            if table not in tables:
+                tables[table] = (OrderedDict(),[])
+            if column is not None:
+                tables[table][0][column] = type
+                if pk is not None:
+                    tables[table][1].append((pk,column))
+        with self._lock:
+            self.tables = dict((name,Table(name,columns,tuple(c for (_,c) in sorted(pk))))
+                                    for (name,(columns,pk)) in tables.items())
+            self.loaded = time.time()
+        return self
+
+    def __contains__(self,table):
+        return table in self.tables
+
+    def table(self,table):
+        try:
+            return self.tables[table]
+        except KeyError:
+            raise KeyError("Unknown table: %s" % table)
+
+    def columns(self,table):
+        return self.table(table).columns
+
+    def primary_key(self,table):
+        return self.table(table).primary_key
+
+    def column_type(self,table,column):
+        try:
+            return self.columns(table)[column]
+        except KeyError:
+            raise KeyError("Unknown column: %s.%s" % (table,column))
+
+    def param_types(self,params):
+        """
+            Resolve 'table.column' entries in a list of parameter types
+            to the column type (other entries are passed through)
+
+            >>> s = Schema()
+            >>> s.tables['t'] = Table('t',OrderedDict([('id','integer')]),('id',))
+            >>> s.param_types(('t.id','text','pg_catalog.int8'))
+            ['integer', 'text', 'pg_catalog.int8']
+        """
+        _types = []
+        for p in params:
+            table,_,column = p.rpartition('.')
+            if table in self.tables and column in self.tables[table].columns:
+                _types.append(self.tables[table].columns[column])
+            else:
+                _types.append(p)
+        return _types
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(optionflags=doctest.ELLIPSIS)
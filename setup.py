@@ -27,8 +27,9 @@ setup(name='pgwrap',
       author_email = 'paul.chakravarti@gmail.com',
       url = 'https://github.com/paulchakravarti/pgwrap',
       cmdclass = { 'readme' : GenerateReadme },
-      packages = ['pgwrap'],
+      packages = ['pgwrap','pgwrap.bench'],
       install_requires = ['psycopg2'],
+      extras_require = { 'psycopg' : ['psycopg'] },
       license = 'BSD',
       classifiers = [ "Topic :: Database",
                       "Programming Language :: Python :: 2",